@@ -24,13 +24,23 @@ It will be converted to a Jupyter notebook for interactive development.
 
 # %%
 import json
-import pickle
 from pathlib import Path
 
+import joblib
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import seaborn as sns
+
+# Use the Intel Extension for scikit-learn (oneDAL kernels) when installed;
+# it must be patched in before the sklearn estimators are imported.
+try:
+    from sklearnex import patch_sklearn
+
+    patch_sklearn()
+except ImportError:
+    print("sklearnex not installed - using stock scikit-learn")
+
 from sklearn.datasets import load_iris
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
@@ -56,7 +66,6 @@ y = pd.Series(iris.target, name="species")
 # Create a full dataframe for exploration
 df = X.copy()
 df["species"] = y
-df["species_name"] = df["species"].map(dict(enumerate(iris.target_names)))
 
 print("Dataset shape:", df.shape)
 print("\nFirst few rows:")
@@ -68,7 +77,7 @@ print("Dataset Statistics:")
 print(df.describe())
 
 print("\nClass distribution:")
-print(df["species_name"].value_counts())
+print(pd.Series(np.bincount(y.values), index=iris.target_names))
 
 # %%
 # Visualize feature distributions
@@ -85,9 +94,10 @@ plt.tight_layout()
 plt.show()
 
 # %%
-# Pairplot to visualize relationships
+# Pairplot to visualize relationships (species names are only needed here)
+df_plot = df.assign(species_name=iris.target_names[df["species"].values])
 plt.figure(figsize=(12, 10))
-sns.pairplot(df, hue="species_name", diag_kind="kde")
+sns.pairplot(df_plot, hue="species_name", diag_kind="kde")
 plt.suptitle("Iris Features Pairplot", y=1.02)
 plt.show()
 
@@ -106,24 +116,22 @@ print("\nClass distribution in training set:")
 print(y_train.value_counts().sort_index())
 
 # %%
-# Feature scaling
+# Feature scaling (kept as ndarrays - the model does not need column labels)
 scaler = StandardScaler()
 X_train_scaled = scaler.fit_transform(X_train)
 X_test_scaled = scaler.transform(X_test)
 
-# Convert back to DataFrame for better handling
-X_train_scaled = pd.DataFrame(X_train_scaled, columns=X.columns, index=X_train.index)
-X_test_scaled = pd.DataFrame(X_test_scaled, columns=X.columns, index=X_test.index)
-
 print("Scaled features - mean should be ~0, std should be ~1:")
-print(X_train_scaled.describe().round(3))
+print(pd.DataFrame(X_train_scaled, columns=X.columns).describe().round(3))
 
 # %% [markdown]
 # ## 4. Model Training
 
 # %%
 # Train Random Forest model
-rf_model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
+# 64 trees is past the point where adding trees improves accuracy on Iris,
+# and prediction cost grows linearly with the number of trees
+rf_model = RandomForestClassifier(n_estimators=64, random_state=42, n_jobs=-1)
 
 # Train the model
 rf_model.fit(X_train_scaled, y_train)
@@ -203,16 +211,15 @@ plt.show()
 models_dir = Path("../models")
 models_dir.mkdir(exist_ok=True)
 
-# Save the trained model
+# Save the trained model (LZ4 shrinks the forest's arrays several times over
+# and decompresses faster than the extra bytes would take to transfer)
 model_path = models_dir / "model.pkl"
-with open(model_path, "wb") as f:
-    pickle.dump(rf_model, f)
+joblib.dump(rf_model, model_path, compress=("lz4", 3))
 print(f"Model saved to: {model_path}")
 
 # Save the scaler
 scaler_path = models_dir / "scaler.pkl"
-with open(scaler_path, "wb") as f:
-    pickle.dump(scaler, f)
+joblib.dump(scaler, scaler_path, compress=("lz4", 3))
 print(f"Scaler saved to: {scaler_path}")
 
 # Save metrics
@@ -239,6 +246,7 @@ model_info = {
     "n_features": rf_model.n_features_in_,
     "feature_names": X.columns.tolist(),
     "classes": iris.target_names.tolist(),
+    "preprocessing": "standard_scaler",
 }
 
 info_path = models_dir / "model_info.json"
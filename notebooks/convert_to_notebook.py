@@ -7,9 +7,44 @@ convention into proper Jupyter notebooks.
 """
 
 import json
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder
+    orjson = None
+
+# Below this many files a thread pool is cheaper than spawning processes
+PROCESS_POOL_MIN_FILES = 8
+
+# A "# %%" cell marker line, optionally indented
+CELL_MARKER = re.compile(r"^[ \t]*# %%.*$", re.MULTILINE)
+
+
+def _append_cell(cells: list[dict[str, Any]], cell_type: str, text: str) -> None:
+    """
+    Split one cell's text into lines and append it if it has content.
+
+    Args:
+        cells: List of cells to append to
+        cell_type: "code" or "markdown"
+        text: Raw text between two cell markers
+    """
+    lines = text.splitlines(keepends=True)
+
+    if cell_type == "markdown":
+        # Remove leading '# ' from markdown lines
+        lines = [line[2:] if line.startswith("# ") else line for line in lines]
+        has_content = bool("".join(lines).strip())
+    else:
+        has_content = bool(text.strip())
+
+    if has_content:
+        cells.append({"cell_type": cell_type, "source": lines})
+
 
 def parse_py_file(content: str) -> list[dict[str, Any]]:
     """
@@ -20,51 +55,30 @@ def parse_py_file(content: str) -> list[dict[str, Any]]:
 
     Returns:
         List of cell dictionaries
+
+    Notes:
+        - Cell boundaries are located with one regex scan and each cell is
+          sliced out of the content and split into lines once
+        - Lines keep their trailing newline so they can be used as notebook
+          source directly
+        - Cells with only blank lines are dropped
     """
+    if content and not content.endswith("\n"):
+        content += "\n"
+
     cells = []
-    current_cell_lines = []
     current_cell_type = "code"
+    start = 0
 
-    lines = content.split("\n")
-    i = 0
-
-    while i < len(lines):
-        line = lines[i]
-
-        # Check for cell marker
-        if line.strip().startswith("# %%"):
-            # Save previous cell if it has content
-            if current_cell_lines and any(line.strip() for line in current_cell_lines):
-                cells.append(
-                    {"cell_type": current_cell_type, "source": current_cell_lines}
-                )
-
-            # Determine cell type
-            if "[markdown]" in line:
-                current_cell_type = "markdown"
-                current_cell_lines = []
-                # Skip the marker line
-                i += 1
-                # Process markdown cell
-                while i < len(lines) and not lines[i].strip().startswith("# %%"):
-                    # Remove leading '# ' from markdown lines
-                    if lines[i].startswith("# "):
-                        current_cell_lines.append(lines[i][2:])
-                    else:
-                        current_cell_lines.append(lines[i])
-                    i += 1
-                i -= 1  # Back up one line
-            else:
-                current_cell_type = "code"
-                current_cell_lines = []
-        else:
-            current_cell_lines.append(line)
+    for marker in CELL_MARKER.finditer(content):
+        _append_cell(cells, current_cell_type, content[start : marker.start()])
 
-        i += 1
+        # Determine cell type; the marker line itself is skipped
+        current_cell_type = "markdown" if "[markdown]" in marker.group() else "code"
+        start = marker.end() + 1
 
     # Don't forget the last cell
-    if current_cell_lines and any(line.strip() for line in current_cell_lines):
-        cells.append({"cell_type": current_cell_type, "source": current_cell_lines})
+    _append_cell(cells, current_cell_type, content[start:])
 
     return cells
 
@@ -87,7 +101,7 @@ def create_notebook(cells: list[dict[str, Any]]) -> dict[str, Any]:
                 {
                     "cell_type": "markdown",
                     "metadata": {},
-                    "source": [line + "\n" for line in cell["source"]],
+                    "source": cell["source"],
                 }
             )
         else:
@@ -104,7 +118,7 @@ def create_notebook(cells: list[dict[str, Any]]) -> dict[str, Any]:
                     "execution_count": None,
                     "metadata": {},
                     "outputs": [],
-                    "source": [line + "\n" for line in source_lines],
+                    "source": source_lines,
                 }
             )
 
@@ -150,13 +164,30 @@ def convert_py_to_ipynb(py_file: Path, ipynb_file: Path) -> None:
     # Create notebook structure
     notebook = create_notebook(cells)
 
-    # Write the notebook
-    with open(ipynb_file, "w") as f:
-        json.dump(notebook, f, indent=2)
+    # Write the notebook (orjson's C encoder is much faster with indentation)
+    if orjson is not None:
+        ipynb_file.write_bytes(orjson.dumps(notebook, option=orjson.OPT_INDENT_2))
+    else:
+        with open(ipynb_file, "w") as f:
+            json.dump(notebook, f, indent=2)
 
     print(f"Converted {py_file} to {ipynb_file}")
 
 
+def _convert_one(task: tuple[Path, Path]) -> None:
+    """
+    Convert a single file, reporting errors instead of raising.
+
+    Args:
+        task: Tuple of (input Python file, output notebook file)
+    """
+    py_file, ipynb_file = task
+    try:
+        convert_py_to_ipynb(py_file, ipynb_file)
+    except Exception as e:
+        print(f"Error converting {py_file}: {e}")
+
+
 def main():
     """Convert all Python files in the notebooks directory to Jupyter notebooks."""
     notebooks_dir = Path(__file__).parent
@@ -166,12 +197,16 @@ def main():
         f for f in notebooks_dir.glob("*.py") if f.name != "convert_to_notebook.py"
     ]
 
-    for py_file in py_files:
-        ipynb_file = py_file.with_suffix(".ipynb")
-        try:
-            convert_py_to_ipynb(py_file, ipynb_file)
-        except Exception as e:
-            print(f"Error converting {py_file}: {e}")
+    tasks = [(f, f.with_suffix(".ipynb")) for f in py_files]
+
+    # Files are independent, so convert them concurrently
+    executor_cls = (
+        ProcessPoolExecutor
+        if len(tasks) >= PROCESS_POOL_MIN_FILES
+        else ThreadPoolExecutor
+    )
+    with executor_cls() as ex:
+        list(ex.map(_convert_one, tasks))
 
 
 if __name__ == "__main__":
@@ -10,25 +10,46 @@ This module implements comprehensive model evaluation including:
 
 import json
 import logging
-import pickle
+import os
 from pathlib import Path
 
+import joblib
 import numpy as np
 import pandas as pd
-from sklearn.metrics import (
-    accuracy_score,
-    classification_report,
-    confusion_matrix,
-    f1_score,
-    precision_score,
-    recall_score,
-)
+
+# Patch scikit-learn with oneDAL-accelerated estimators when available. This
+# must happen before any sklearn estimator or metric is imported.
+try:
+    from sklearnex import patch_sklearn
+
+    patch_sklearn()
+except ImportError:
+    pass
+
+from sklearn.base import clone
+from sklearn.metrics import confusion_matrix
 from sklearn.model_selection import cross_val_score
 
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Optionally start the joblib worker pool at import time (KF_PREWARM=1) so the
+# first parallel cross-validation does not pay the worker start-up cost
+if os.environ.get("KF_PREWARM") == "1":
+    joblib.Parallel(n_jobs=-1)(joblib.delayed(int)() for _ in range(1))
+
+# Minimum number of predictions for which the parallel numba kernel is used
+# to summarize prediction confidence. Its first call loads the compiled
+# kernel and starts numba's thread pool (~0.2 s), which numpy's reduction
+# only exceeds at a few million rows; evaluation calls it once per run
+NUMBA_MIN_ROWS = 5_000_000
+
 
 def load_model_artifacts(model_dir: str) -> tuple:
     """
@@ -38,22 +59,42 @@ def load_model_artifacts(model_dir: str) -> tuple:
         model_dir: Directory containing model artifacts
 
     Returns:
-        Tuple containing model, scaler, and metrics
+        Tuple containing model, scaler (None if the model was trained on
+        raw features), and metrics
 
     Raises:
         FileNotFoundError: If required artifacts are missing
+
+    Notes:
+        - Artifacts are loaded with joblib, which detects compressed
+          (e.g. LZ4) dumps as well as plain pickles
+        - The model's n_jobs is reset to 1: for the small batches predicted
+          here, dispatching trees to joblib workers costs more than the
+          prediction itself
+        - Whether to scale is decided by the "preprocessing" entry of
+          model_info.json: for "none" (raw-feature models) any scaler.pkl in
+          the directory is stale and ignored. Directories without the entry
+          use scaler.pkl when it is present
     """
     model_path = Path(model_dir)
 
     # Load model
-    with open(model_path / "model.pkl", "rb") as f:
-        model = pickle.load(f)
+    model = joblib.load(model_path / "model.pkl")
+    model.n_jobs = 1
     logger.info("Model loaded successfully")
 
-    # Load scaler
-    with open(model_path / "scaler.pkl", "rb") as f:
-        scaler = pickle.load(f)
-    logger.info("Scaler loaded successfully")
+    # Load model info (older model directories may not have one)
+    info_path = model_path / "model_info.json"
+    model_info = json.loads(info_path.read_text()) if info_path.exists() else {}
+
+    # Load scaler (only models trained on standardized features use one)
+    scaler_path = model_path / "scaler.pkl"
+    if model_info.get("preprocessing") != "none" and scaler_path.exists():
+        scaler = joblib.load(scaler_path)
+        logger.info("Scaler loaded successfully")
+    else:
+        scaler = None
+        logger.info("No scaler found, evaluating on raw features")
 
     # Load training metrics
     with open(model_path / "metrics.json") as f:
@@ -63,17 +104,137 @@ def load_model_artifacts(model_dir: str) -> tuple:
     return model, scaler, train_metrics
 
 
+def _confidence_stats_numpy(proba):
+    """Mean, std, min and max of the per-row maximum class probability."""
+    confidence = proba.max(axis=1)
+    return (
+        confidence.mean(),
+        confidence.std(),
+        confidence.min(),
+        confidence.max(),
+    )
+
+
+if njit is not None:
+
+    @njit(cache=True, fastmath=True, parallel=True)
+    def _confidence_stats_numba(proba):
+        """Mean, std, min and max of the per-row maximum class probability."""
+        n, c = proba.shape
+        confidence = np.empty(n)
+        for i in prange(n):
+            row_max = proba[i, 0]
+            for j in range(1, c):
+                if proba[i, j] > row_max:
+                    row_max = proba[i, j]
+            confidence[i] = row_max
+        return (
+            confidence.mean(),
+            confidence.std(),
+            confidence.min(),
+            confidence.max(),
+        )
+
+else:
+    _confidence_stats_numba = None
+
+
+def _confidence_stats(proba):
+    """Mean, std, min and max of the per-row maximum class probability."""
+    if _confidence_stats_numba is not None and len(proba) >= NUMBA_MIN_ROWS:
+        return _confidence_stats_numba(proba)
+    return _confidence_stats_numpy(proba)
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Element-wise division that yields 0 where the denominator is 0."""
+    return np.divide(
+        numerator,
+        denominator,
+        out=np.zeros_like(numerator, dtype=float),
+        where=denominator != 0,
+    )
+
+
+def classification_metrics_from_confusion_matrix(
+    cm: np.ndarray, target_names: list[str]
+) -> dict[str, any]:
+    """
+    Derive per-class and averaged classification metrics from a confusion matrix.
+
+    Args:
+        cm: Confusion matrix with true labels on rows and predictions on columns
+        target_names: Display names for the rows/columns of cm
+
+    Returns:
+        Dict in the format of sklearn's classification_report(output_dict=True)
+
+    Raises:
+        ValueError: If target_names does not name every row of cm
+
+    Notes:
+        - Every metric comes from the matrix totals, so the labels are not
+          traversed again for each score
+        - Undefined precision/recall/F1 (zero denominator) are reported as 0
+    """
+    if len(target_names) != cm.shape[0]:
+        raise ValueError(
+            f"Number of classes, {cm.shape[0]}, does not match size of "
+            f"target_names, {len(target_names)}"
+        )
+
+    tp = np.diag(cm).astype(float)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    total = support.sum()
+
+    precision = _safe_divide(tp, predicted)
+    recall = _safe_divide(tp, support)
+    f1 = _safe_divide(2 * precision * recall, precision + recall)
+    weights = support / total
+
+    report = {
+        name: {
+            "precision": float(p),
+            "recall": float(r),
+            "f1-score": float(f),
+            "support": int(n),
+        }
+        for name, p, r, f, n in zip(target_names, precision, recall, f1, support)
+    }
+    report["accuracy"] = float(tp.sum() / total)
+    report["macro avg"] = {
+        "precision": float(precision.mean()),
+        "recall": float(recall.mean()),
+        "f1-score": float(f1.mean()),
+        "support": int(total),
+    }
+    report["weighted avg"] = {
+        "precision": float(precision @ weights),
+        "recall": float(recall @ weights),
+        "f1-score": float(f1 @ weights),
+        "support": int(total),
+    }
+
+    return report
+
+
 def evaluate_model_performance(
-    model, X_test: pd.DataFrame, y_test: pd.Series, class_names: list | None = None
+    model,
+    X_test: np.ndarray,
+    y_test: pd.Series,
+    class_names: list | None = None,
+    feature_names: list[str] | None = None,
 ) -> dict[str, any]:
     """
     Perform comprehensive model evaluation.
 
     Args:
         model: Trained model
-        X_test: Test features
+        X_test: Test features as a 2D array
         y_test: True labels
-        class_names: Names of target classes
+        class_names: Names of the model's classes, in model.classes_ order
+        feature_names: Names of the feature columns in X_test
 
     Returns:
         Dict containing evaluation metrics and results
@@ -82,34 +243,41 @@ def evaluate_model_performance(
         - Calculates multiple classification metrics
         - Generates confusion matrix
         - Produces classification report
+        - All metrics are derived from the confusion matrix in one pass
     """
     logger.info("Evaluating model performance...")
 
-    # Make predictions
-    y_pred = model.predict(X_test)
+    # Make predictions; predict() is argmax over predict_proba(), so derive
+    # the labels from the probabilities instead of traversing the trees twice
     y_pred_proba = model.predict_proba(X_test)
-
-    # Calculate metrics
-    accuracy = accuracy_score(y_test, y_pred)
-    precision = precision_score(y_test, y_pred, average="weighted")
-    recall = recall_score(y_test, y_pred, average="weighted")
-    f1 = f1_score(y_test, y_pred, average="weighted")
-
-    # Confusion matrix
-    cm = confusion_matrix(y_test, y_pred)
-
-    # Classification report
-    report = classification_report(
-        y_test, y_pred, target_names=class_names, output_dict=True
-    )
+    y_pred = model.classes_[np.argmax(y_pred_proba, axis=1)]
+
+    # Confusion matrix over the model's classes, in the order class_names
+    # follows, so a class absent from both y_test and y_pred still gets its
+    # own row instead of shifting the rest
+    labels = model.classes_
+    if class_names is None:
+        class_names = [str(label) for label in labels]
+    cm = confusion_matrix(y_test, y_pred, labels=labels)
+
+    # Classification report and weighted metrics
+    report = classification_metrics_from_confusion_matrix(cm, class_names)
+    accuracy = report["accuracy"]
+    precision = report["weighted avg"]["precision"]
+    recall = report["weighted avg"]["recall"]
+    f1 = report["weighted avg"]["f1-score"]
 
     # Feature importance (for tree-based models)
     feature_importance = None
     if hasattr(model, "feature_importances_"):
-        feature_importance = {
-            feature: float(importance)
-            for feature, importance in zip(X_test.columns, model.feature_importances_)
-        }
+        if feature_names is None:
+            feature_names = [str(i) for i in range(X_test.shape[1])]
+        feature_importance = dict(
+            zip(feature_names, model.feature_importances_.tolist())
+        )
+
+    # Per-sample confidence (highest class probability) statistics
+    conf_mean, conf_std, conf_min, conf_max = _confidence_stats(y_pred_proba)
 
     evaluation_results = {
         "accuracy": float(accuracy),
@@ -120,10 +288,10 @@ def evaluate_model_performance(
         "classification_report": report,
         "feature_importance": feature_importance,
         "prediction_confidence": {
-            "mean": float(np.mean(np.max(y_pred_proba, axis=1))),
-            "std": float(np.std(np.max(y_pred_proba, axis=1))),
-            "min": float(np.min(np.max(y_pred_proba, axis=1))),
-            "max": float(np.max(np.max(y_pred_proba, axis=1))),
+            "mean": float(conf_mean),
+            "std": float(conf_std),
+            "min": float(conf_min),
+            "max": float(conf_max),
         },
     }
 
@@ -133,14 +301,14 @@ def evaluate_model_performance(
 
 
 def perform_cross_validation(
-    model, X: pd.DataFrame, y: pd.Series, cv_folds: int = 5
+    model, X: np.ndarray, y: pd.Series, cv_folds: int = 5
 ) -> dict[str, float]:
     """
     Perform cross-validation to assess model stability.
 
     Args:
         model: Trained model
-        X: Features
+        X: Features as a 2D array
         y: Labels
         cv_folds: Number of cross-validation folds
 
@@ -150,10 +318,22 @@ def perform_cross_validation(
     Notes:
         - Uses stratified k-fold for balanced evaluation
         - Provides insight into model variance
+        - Folds are fitted in parallel on an unfitted clone of the model, so
+          the trained forest is not shipped to the worker processes
+        - Each fold fits its forest with n_jobs=1: the folds already run in
+          parallel, and nesting tree-level threads inside every fold worker
+          would oversubscribe the cores
     """
     logger.info(f"Performing {cv_folds}-fold cross-validation...")
 
-    cv_scores = cross_val_score(model, X, y, cv=cv_folds, scoring="accuracy")
+    cv_scores = cross_val_score(
+        clone(model).set_params(n_jobs=1),
+        X,
+        y,
+        cv=cv_folds,
+        scoring="accuracy",
+        n_jobs=-1,
+    )
 
     cv_results = {
         "cv_scores": cv_scores.tolist(),
@@ -197,11 +377,10 @@ def check_model_thresholds(
         "f1_value": evaluation_results["f1_score"],
         "accuracy_threshold": accuracy_threshold,
         "f1_threshold": f1_threshold,
-        "all_checks_passed": True,
     }
 
     # Overall check
-    checks["all_checks_passed"] = all([checks["accuracy_check"], checks["f1_check"]])
+    checks["all_checks_passed"] = checks["accuracy_check"] and checks["f1_check"]
 
     logger.info(
         f"Threshold checks - Accuracy: {checks['accuracy_check']}, F1: {checks['f1_check']}"
@@ -276,29 +455,32 @@ def main(
     # For demo, we'll re-load and split the Iris data
     # In production, this would load from test_data_path
     from sklearn.datasets import load_iris
-    from sklearn.model_selection import train_test_split
+
+    from train_model import stratified_split
 
     iris = load_iris()
     X = pd.DataFrame(iris.data, columns=iris.feature_names)
     y = pd.Series(iris.target)
 
-    # Use same split as training for consistency
-    _, X_test, _, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+    # Scale the full dataset once (if the model uses a scaler); the test rows
+    # are selected from it below
+    X_scaled = X.to_numpy() if scaler is None else scaler.transform(X)
 
-    # Scale test data
-    X_test_scaled = scaler.transform(X_test)
-    X_test_scaled = pd.DataFrame(X_test_scaled, columns=X.columns)
+    # Use same split as training for consistency
+    _, test_idx = stratified_split(y, test_size=0.2, random_state=42)
+    X_test_scaled = X_scaled[test_idx]
+    y_test = y.iloc[test_idx]
 
     # Evaluate model
     evaluation_results = evaluate_model_performance(
-        model, X_test_scaled, y_test, class_names=iris.target_names.tolist()
+        model,
+        X_test_scaled,
+        y_test,
+        class_names=iris.target_names.tolist(),
+        feature_names=X.columns.tolist(),
     )
 
     # Cross-validation on full scaled dataset
-    X_scaled = scaler.transform(X)
-    X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
     cv_results = perform_cross_validation(model, X_scaled, y, cv_folds)
 
     # Check deployment thresholds
@@ -9,15 +9,33 @@ This module implements a REST API for model inference with:
 - Integration ready for KServe
 """
 
+import asyncio
 import json
 import logging
-import pickle
+import os
 from datetime import datetime
 from pathlib import Path
 
+import joblib
 import numpy as np
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field, validator
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel, Field
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+try:
+    import tl2cgen
+except ImportError:
+    tl2cgen = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -28,14 +46,48 @@ app = FastAPI(
     title="Iris Model Serving API",
     description="REST API for Iris classification model serving",
     version="1.0.0",
+    # orjson serializes the (float-heavy) prediction payloads in C
+    default_response_class=ORJSONResponse if orjson is not None else JSONResponse,
 )
 
 # Global variables for model artifacts
 MODEL = None
-SCALER = None
+TREES = None
+LEAF_PROBS = None
+SCALER_MEAN = None
+SCALER_SCALE = None
 MODEL_INFO = None
+MODEL_INFO_RESPONSE = None
 CLASS_NAMES = ["setosa", "versicolor", "virginica"]
 
+# Smallest batch worth spreading sklearn tree traversal over all cores
+PARALLEL_PREDICT_MIN_ROWS = 256
+
+# Concurrent /predict requests are coalesced into one batched prediction of
+# up to MICRO_BATCH_MAX_SIZE rows, waiting at most MICRO_BATCH_TIMEOUT_S
+MICRO_BATCH_MAX_SIZE = 64
+MICRO_BATCH_TIMEOUT_S = 0.002
+PREDICT_QUEUE = None
+_batch_task = None
+
+# Static endpoint payloads, built once instead of per request
+ROOT_RESPONSE = {
+    "name": "Iris Model Serving API",
+    "version": "1.0.0",
+    "description": "REST API for Iris classification",
+    "endpoints": {
+        "health": "/health",
+        "model_info": "/model/info",
+        "predict": "/predict",
+        "batch_predict": "/predict/batch",
+    },
+}
+KSERVE_MODEL_METADATA = {
+    "platform": "sklearn",
+    "inputs": [{"name": "input", "datatype": "FP32", "shape": [-1, 4]}],
+    "outputs": [{"name": "output", "datatype": "INT64", "shape": [-1]}],
+}
+
 
 class IrisFeatures(BaseModel):
     """
@@ -49,13 +101,6 @@ class IrisFeatures(BaseModel):
     petal_length: float = Field(..., gt=0, description="Petal length in cm")
     petal_width: float = Field(..., gt=0, description="Petal width in cm")
 
-    @validator("*")
-    def validate_positive(cls, v, field):
-        """Ensure all measurements are positive."""
-        if v <= 0:
-            raise ValueError(f"{field.name} must be positive")
-        return v
-
     class Config:
         json_schema_extra = {
             "example": {
@@ -71,7 +116,10 @@ class BatchPredictionRequest(BaseModel):
     """Schema for batch prediction requests."""
 
     instances: list[IrisFeatures] = Field(
-        ..., description="List of instances to predict"
+        ...,
+        min_length=1,
+        max_length=10000,
+        description="List of instances to predict",
     )
 
     class Config:
@@ -135,20 +183,38 @@ def load_model_artifacts(model_dir: str = "models") -> None:
     Raises:
         RuntimeError: If model loading fails
     """
-    global MODEL, SCALER, MODEL_INFO
+    global MODEL, TREES, LEAF_PROBS, SCALER_MEAN, SCALER_SCALE
+    global MODEL_INFO, MODEL_INFO_RESPONSE
 
     try:
         model_path = Path(model_dir)
 
-        # Load model
-        with open(model_path / "model.pkl", "rb") as f:
-            MODEL = pickle.load(f)
-        logger.info("Model loaded successfully")
-
-        # Load scaler
-        with open(model_path / "scaler.pkl", "rb") as f:
-            SCALER = pickle.load(f)
-        logger.info("Scaler loaded successfully")
+        # Load model (prefer the compiled treelite library, then the ONNX
+        # export, when their runtimes are installed)
+        lib_path = model_path / "model.so"
+        onnx_path = model_path / "model.onnx"
+        if tl2cgen is not None and lib_path.exists():
+            MODEL = tl2cgen.Predictor(str(lib_path))
+            TREES = LEAF_PROBS = None
+            logger.info("Compiled model loaded successfully")
+        elif onnxruntime is not None and onnx_path.exists():
+            MODEL = onnxruntime.InferenceSession(
+                str(onnx_path), providers=["CPUExecutionProvider"]
+            )
+            TREES = LEAF_PROBS = None
+            logger.info("ONNX model loaded successfully")
+        else:
+            # joblib reads both plain and compressed pickles
+            MODEL = joblib.load(model_path / "model.pkl")
+            # Predict inline on the request thread; joblib dispatch costs
+            # more than traversing the trees for a handful of rows. None
+            # means one job unless a joblib.parallel_config block (scoped
+            # to the calling thread) asks for more, so the shared model is
+            # never mutated per request
+            MODEL.n_jobs = None
+            TREES = [estimator.tree_ for estimator in MODEL.estimators_]
+            LEAF_PROBS = _leaf_probability_table(TREES)
+            logger.info("Model loaded successfully")
 
         # Load model info
         with open(model_path / "model_info.json") as f:
@@ -156,33 +222,212 @@ def load_model_artifacts(model_dir: str = "models") -> None:
         MODEL_INFO["loaded_at"] = datetime.now().isoformat()
         logger.info("Model info loaded successfully")
 
+        # Load scaler statistics (only models trained on standardized
+        # features use a scaler; tree ensembles do not need one). Raw-feature
+        # models record "preprocessing": "none", and any scaler.pkl next to
+        # them is stale; older model directories without the entry use
+        # scaler.pkl when present. Kept as plain arrays so requests scale
+        # without sklearn's input validation
+        scaler_path = model_path / "scaler.pkl"
+        if MODEL_INFO.get("preprocessing") != "none" and scaler_path.exists():
+            scaler = joblib.load(scaler_path)
+            SCALER_MEAN = scaler.mean_
+            SCALER_SCALE = scaler.scale_
+            logger.info("Scaler loaded successfully")
+        else:
+            SCALER_MEAN = SCALER_SCALE = None
+            logger.info("No scaler in use, serving raw features")
+
+        # Build the /model/info response once; it only changes on reload
+        MODEL_INFO_RESPONSE = _build_model_info(model_path)
+
     except Exception as e:
         logger.error(f"Failed to load model artifacts: {e}")
         raise RuntimeError(f"Model loading failed: {e}")
 
 
+def _build_model_info(model_path: Path) -> ModelInfo:
+    """
+    Build the model information response from the loaded artifacts.
+
+    Args:
+        model_path: Directory containing model artifacts
+
+    Returns:
+        ModelInfo describing the loaded model
+    """
+    # Get training metrics if available
+    training_accuracy = None
+    try:
+        with open(model_path / "metrics.json") as f:
+            metrics = json.load(f)
+            training_accuracy = metrics.get("test_accuracy")
+    except Exception:
+        pass
+
+    # model_info.json stores the label-encoded class IDs
+    classes = [
+        CLASS_NAMES[c] if isinstance(c, int) else str(c)
+        for c in MODEL_INFO.get("classes", CLASS_NAMES)
+    ]
+
+    return ModelInfo(
+        model_type=MODEL_INFO.get("model_type", "Unknown"),
+        version="1.0.0",
+        n_features=MODEL_INFO.get("n_features", 4),
+        feature_names=MODEL_INFO.get(
+            "feature_names",
+            [
+                "sepal length (cm)",
+                "sepal width (cm)",
+                "petal length (cm)",
+                "petal width (cm)",
+            ],
+        ),
+        classes=classes,
+        training_accuracy=training_accuracy,
+        loaded_at=MODEL_INFO.get("loaded_at", datetime.now().isoformat()),
+    )
+
+
+def _leaf_probability_table(trees: list) -> np.ndarray:
+    """
+    Stack the class distribution of every node of every tree.
+
+    Args:
+        trees: Fitted sklearn Tree objects of a forest
+
+    Returns:
+        float64 array of shape (n_trees, max_nodes, n_classes), zero padded
+
+    Notes:
+        - Rows are normalized exactly like DecisionTreeClassifier.predict_proba
+        - The table stays float64: rounding it to float32 changes the summed
+          probabilities, and with them the argmax at ties, relative to the
+          predict_proba path used for large batches
+    """
+    max_nodes = max(tree.node_count for tree in trees)
+    table = np.zeros((len(trees), max_nodes, trees[0].n_classes[0]))
+    for i, tree in enumerate(trees):
+        values = tree.value[:, 0, :]
+        table[i, : tree.node_count] = values / values.sum(axis=1, keepdims=True)
+    return table
+
+
+def _predict(input_data: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Predict class IDs and class probabilities for raw features.
+
+    Args:
+        input_data: Feature matrix of shape (n_samples, 4)
+
+    Returns:
+        Tuple of (predicted class IDs, class probabilities)
+    """
+    # Scale features if the model was trained on standardized inputs
+    if SCALER_MEAN is not None:
+        input_data = (input_data - SCALER_MEAN) / SCALER_SCALE
+
+    if onnxruntime is not None and isinstance(MODEL, onnxruntime.InferenceSession):
+        # sklearn also casts to float32 before traversing the trees
+        labels, probabilities = MODEL.run(
+            None, {"input": input_data.astype(np.float32)}
+        )
+        return labels, probabilities
+
+    if tl2cgen is not None and isinstance(MODEL, tl2cgen.Predictor):
+        # Round through float32 as sklearn does, then match the library's
+        # float64 thresholds; the output has shape (n_samples, 1, n_classes)
+        X = input_data.astype(np.float32).astype(np.float64)
+        probabilities = MODEL.predict(tl2cgen.DMatrix(X)).reshape(len(X), -1)
+        # Columns follow the forest's integer class ids; model_info's classes
+        # may hold display names instead, so don't map through them
+        return probabilities.argmax(axis=1), probabilities
+
+    if len(input_data) < PARALLEL_PREDICT_MIN_ROWS:
+        # Look up each tree's leaf distributions in the precomputed table
+        # (no per-tree predict_proba) and accumulate them in place, so peak
+        # memory stays at one (n_samples, n_classes) buffer
+        X = np.ascontiguousarray(input_data, dtype=np.float32)
+        probabilities = np.zeros((len(X), LEAF_PROBS.shape[2]))
+        for tree, leaf_probs in zip(TREES, LEAF_PROBS):
+            probabilities += leaf_probs[tree.apply(X)]
+        probabilities /= len(TREES)
+    else:
+        # Only large batches amortize joblib's worker dispatch
+        with joblib.parallel_config(n_jobs=os.cpu_count()):
+            probabilities = MODEL.predict_proba(input_data)
+
+    # predict() is argmax over predict_proba(), so traverse the forest once
+    return MODEL.classes_.take(probabilities.argmax(axis=1)), probabilities
+
+
+async def _micro_batch_worker() -> None:
+    """
+    Serve queued single-row predictions in batches.
+
+    Notes:
+        - Each queue item is a (features, future) pair; the future receives
+          the (class ID, probabilities) of its row
+        - One tree traversal per batch replaces one per request
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        rows, futures = [], []
+        row, future = await PREDICT_QUEUE.get()
+        deadline = loop.time() + MICRO_BATCH_TIMEOUT_S
+        while True:
+            rows.append(row)
+            futures.append(future)
+            if len(rows) >= MICRO_BATCH_MAX_SIZE:
+                break
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                row, future = await asyncio.wait_for(PREDICT_QUEUE.get(), timeout)
+            except TimeoutError:
+                break
+
+        try:
+            # float64, like training, so scaled values match the tree splits
+            prediction_ids, probabilities = _predict(np.array(rows, dtype=np.float64))
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+
+        for future, prediction, probs in zip(
+            futures, prediction_ids.tolist(), probabilities.tolist()
+        ):
+            if not future.done():
+                future.set_result((prediction, probs))
+
+
 @app.on_event("startup")
 async def startup_event():
     """Load model artifacts on API startup."""
+    global PREDICT_QUEUE, _batch_task
+
     logger.info("Starting model serving API...")
     load_model_artifacts()
+    PREDICT_QUEUE = asyncio.Queue()
+    _batch_task = asyncio.create_task(_micro_batch_worker())
     logger.info("Model serving API ready")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the prediction micro-batcher."""
+    if _batch_task is not None:
+        _batch_task.cancel()
+
+
 @app.get("/", tags=["General"])
 async def root():
     """Root endpoint with API information."""
-    return {
-        "name": "Iris Model Serving API",
-        "version": "1.0.0",
-        "description": "REST API for Iris classification",
-        "endpoints": {
-            "health": "/health",
-            "model_info": "/model/info",
-            "predict": "/predict",
-            "batch_predict": "/predict/batch",
-        },
-    }
+    return ROOT_RESPONSE
 
 
 @app.get("/health", tags=["Health"])
@@ -201,32 +446,7 @@ async def get_model_info():
     if MODEL is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
 
-    # Get training metrics if available
-    training_accuracy = None
-    try:
-        with open("models/metrics.json") as f:
-            metrics = json.load(f)
-            training_accuracy = metrics.get("test_accuracy")
-    except Exception:
-        pass
-
-    return ModelInfo(
-        model_type=MODEL_INFO.get("model_type", "Unknown"),
-        version="1.0.0",
-        n_features=MODEL_INFO.get("n_features", 4),
-        feature_names=MODEL_INFO.get(
-            "feature_names",
-            [
-                "sepal length (cm)",
-                "sepal width (cm)",
-                "petal length (cm)",
-                "petal width (cm)",
-            ],
-        ),
-        classes=MODEL_INFO.get("classes", CLASS_NAMES),
-        training_accuracy=training_accuracy,
-        loaded_at=MODEL_INFO.get("loaded_at", datetime.now().isoformat()),
-    )
+    return MODEL_INFO_RESPONSE
 
 
 @app.post("/predict", response_model=PredictionResponse, tags=["Prediction"])
@@ -240,39 +460,26 @@ async def predict(features: IrisFeatures):
     Returns:
         PredictionResponse with prediction details
     """
-    if MODEL is None or SCALER is None:
+    if MODEL is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
 
     try:
-        # Prepare input data
-        input_data = np.array(
-            [
-                [
-                    features.sepal_length,
-                    features.sepal_width,
-                    features.petal_length,
-                    features.petal_width,
-                ]
-            ]
+        # Queue the row for the micro-batcher and wait for its result
+        row = (
+            features.sepal_length,
+            features.sepal_width,
+            features.petal_length,
+            features.petal_width,
         )
-
-        # Scale features
-        input_scaled = SCALER.transform(input_data)
-
-        # Make prediction
-        prediction = MODEL.predict(input_scaled)[0]
-        probabilities = MODEL.predict_proba(input_scaled)[0]
-
-        # Prepare response
-        prob_dict = {
-            CLASS_NAMES[i]: float(prob) for i, prob in enumerate(probabilities)
-        }
+        future = asyncio.get_running_loop().create_future()
+        await PREDICT_QUEUE.put((row, future))
+        prediction, probabilities = await future
 
         return PredictionResponse(
             prediction=CLASS_NAMES[prediction],
-            prediction_id=int(prediction),
-            confidence=float(max(probabilities)),
-            probabilities=prob_dict,
+            prediction_id=prediction,
+            confidence=max(probabilities),
+            probabilities=dict(zip(CLASS_NAMES, probabilities)),
             timestamp=datetime.now().isoformat(),
         )
 
@@ -292,48 +499,48 @@ async def predict_batch(request: BatchPredictionRequest):
     Returns:
         BatchPredictionResponse with all predictions
     """
-    if MODEL is None or SCALER is None:
+    if MODEL is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
 
     start_time = datetime.now()
-    predictions = []
 
     try:
-        # Process each instance
-        for instance in request.instances:
-            # Prepare input data
-            input_data = np.array(
-                [
-                    [
-                        instance.sepal_length,
-                        instance.sepal_width,
-                        instance.petal_length,
-                        instance.petal_width,
-                    ]
-                ]
-            )
-
-            # Scale features
-            input_scaled = SCALER.transform(input_data)
-
-            # Make prediction
-            prediction = MODEL.predict(input_scaled)[0]
-            probabilities = MODEL.predict_proba(input_scaled)[0]
-
-            # Prepare response
-            prob_dict = {
-                CLASS_NAMES[i]: float(prob) for i, prob in enumerate(probabilities)
-            }
-
-            predictions.append(
-                PredictionResponse(
-                    prediction=CLASS_NAMES[prediction],
-                    prediction_id=int(prediction),
-                    confidence=float(max(probabilities)),
-                    probabilities=prob_dict,
-                    timestamp=datetime.now().isoformat(),
+        # Prepare input data as a single (N, 4) array
+        n_instances = len(request.instances)
+        input_data = np.fromiter(
+            (
+                value
+                for instance in request.instances
+                for value in (
+                    instance.sepal_length,
+                    instance.sepal_width,
+                    instance.petal_length,
+                    instance.petal_width,
                 )
+            ),
+            dtype=np.float64,
+            count=4 * n_instances,
+        ).reshape(n_instances, 4)
+
+        # Predict the whole batch at once
+        prediction_ids, probabilities = _predict(input_data)
+        confidences = probabilities.max(axis=1)
+
+        # Prepare responses (one timestamp shared by the whole batch; tolist
+        # converts every numpy scalar in a single C pass)
+        timestamp = start_time.isoformat()
+        predictions = [
+            PredictionResponse(
+                prediction=CLASS_NAMES[prediction],
+                prediction_id=prediction,
+                confidence=confidence,
+                probabilities=dict(zip(CLASS_NAMES, probs)),
+                timestamp=timestamp,
             )
+            for prediction, confidence, probs in zip(
+                prediction_ids.tolist(), confidences.tolist(), probabilities.tolist()
+            )
+        ]
 
         # Calculate processing time
         processing_time = (datetime.now() - start_time).total_seconds() * 1000
@@ -367,12 +574,7 @@ async def kserve_live():
 @app.get("/v2/models/{model_name}", tags=["KServe"])
 async def kserve_model_metadata(model_name: str):
     """KServe model metadata endpoint."""
-    return {
-        "name": model_name,
-        "platform": "sklearn",
-        "inputs": [{"name": "input", "datatype": "FP32", "shape": [-1, 4]}],
-        "outputs": [{"name": "output", "datatype": "INT64", "shape": [-1]}],
-    }
+    return {"name": model_name, **KSERVE_MODEL_METADATA}
 
 
 if __name__ == "__main__":
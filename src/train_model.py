@@ -12,19 +12,64 @@ It demonstrates how to:
 import json
 import logging
 import pickle
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+import joblib
+import numpy as np
 import pandas as pd
+from sklearn import config_context
 from sklearn.datasets import load_iris
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
+
+try:
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+except ImportError:
+    convert_sklearn = None
+
+try:
+    import tl2cgen
+    import treelite.sklearn
+except ImportError:
+    tl2cgen = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
+def _load_iris_arrays() -> tuple[np.ndarray, np.ndarray, list[str], list[str]]:
+    """
+    Parse the bundled Iris dataset once per process.
+
+    Returns:
+        Tuple of (float32 features, labels, feature names, class names)
+
+    Notes:
+        - The arrays are shared by every caller, so they are made read-only
+    """
+    iris = load_iris()
+    data = iris.data.astype(np.float32)
+    target = iris.target
+    data.flags.writeable = False
+    target.flags.writeable = False
+    return data, target, iris.feature_names, iris.target_names.tolist()
+
+
 def load_and_prepare_data() -> tuple[pd.DataFrame, pd.Series]:
     """
     Load the Iris dataset and prepare it for training.
@@ -33,49 +78,102 @@ def load_and_prepare_data() -> tuple[pd.DataFrame, pd.Series]:
         Tuple[pd.DataFrame, pd.Series]: Features (X) and labels (y)
 
     Notes:
-        - Uses the built-in Iris dataset from scikit-learn
+        - Uses the built-in Iris dataset from scikit-learn, parsed once per
+          process and reused by later calls
         - This is a classification problem with 3 classes
         - Features: sepal length/width, petal length/width
+        - Features are float32, the dtype the forest fits on, so it does not
+          need a float64 copy
+        - The pandas objects wrap the cached arrays; main trains on their
+          to_numpy() views, which do not copy
     """
     logger.info("Loading Iris dataset...")
-    iris = load_iris()
+    data, target, feature_names, target_names = _load_iris_arrays()
 
-    # Create DataFrame for better handling
-    X = pd.DataFrame(iris.data, columns=iris.feature_names)
-    y = pd.Series(iris.target, name="species")
+    # Create DataFrame for better handling (wraps the cached arrays)
+    X = pd.DataFrame(data, columns=feature_names, copy=False)
+    y = pd.Series(target, name="species", copy=False)
 
     logger.info(f"Dataset loaded: {X.shape[0]} samples, {X.shape[1]} features")
-    logger.info(f"Classes: {iris.target_names.tolist()}")
+    logger.info(f"Classes: {target_names}")
 
     return X, y
 
 
+def stratified_split(
+    y: pd.Series | np.ndarray,
+    test_size: float = 0.2,
+    random_state: int = 42,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Split row indices into train and test sets, stratified by class.
+
+    Args:
+        y: Class labels
+        test_size: Proportion of each class to put in the test set
+        random_state: Random seed for reproducibility
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Sorted train and test row indices
+
+    Notes:
+        - Samples round(test_size * n_c) rows of every class c with one
+          seeded permutation per class, avoiding StratifiedShuffleSplit
+        - evaluate_model reuses this to rebuild the same test set
+        - The rows differ from those train_test_split(stratify=y) picks for
+          the same seed, so metrics of models trained before this splitter
+          are not comparable row for row
+    """
+    rng = np.random.default_rng(random_state)
+    classes, y_idx = np.unique(np.asarray(y), return_inverse=True)
+
+    test_mask = np.zeros(len(y_idx), dtype=bool)
+    for c in range(len(classes)):
+        members = np.flatnonzero(y_idx == c)
+        n_test = round(test_size * len(members))
+        test_mask[rng.permutation(members)[:n_test]] = True
+
+    return np.flatnonzero(~test_mask), np.flatnonzero(test_mask)
+
+
 def train_model(
-    X_train: pd.DataFrame,
-    y_train: pd.Series,
+    X_train: np.ndarray,
+    y_train: np.ndarray,
     n_estimators: int = 100,
     random_state: int = 42,
+    max_depth: int | None = 6,
+    max_features: str | int | float | None = None,
+    min_samples_leaf: int = 2,
 ) -> RandomForestClassifier:
     """
     Train a Random Forest classifier on the provided data.
 
     Args:
-        X_train: Training features
-        y_train: Training labels
+        X_train: Training features as a 2D float32 array
+        y_train: Training labels as a 1D array
         n_estimators: Number of trees in the forest
         random_state: Random seed for reproducibility
+        max_depth: Maximum depth of each tree
+        max_features: Features considered per split (None = all)
+        min_samples_leaf: Minimum number of samples in a leaf
 
     Returns:
         RandomForestClassifier: Trained model
 
     Notes:
         - Random Forest is chosen for its robustness and interpretability
-        - No hyperparameter tuning in this simple example
+        - The tree-shape defaults are specialized for the 4-feature Iris
+          problem: full-feature splits are cheap with 4 features, and
+          120 training rows need no deeper trees, so capping depth and leaf
+          size keeps prediction paths short without costing accuracy
     """
     logger.info(f"Training Random Forest with {n_estimators} estimators...")
 
     model = RandomForestClassifier(
         n_estimators=n_estimators,
+        max_depth=max_depth,
+        max_features=max_features,
+        min_samples_leaf=min_samples_leaf,
         random_state=random_state,
         n_jobs=-1,  # Use all CPU cores
     )
@@ -88,59 +186,138 @@ def train_model(
 
 def save_artifacts(
     model: RandomForestClassifier,
-    scaler: StandardScaler,
     metrics: dict[str, float],
     output_dir: str = "models",
+    feature_names: list[str] | None = None,
 ) -> None:
     """
     Save model artifacts and metadata for later use.
 
     Args:
         model: Trained model
-        scaler: Fitted scaler
         metrics: Model performance metrics
         output_dir: Directory to save artifacts
+        feature_names: Names of the feature columns, in model input order
 
     Notes:
-        - Saves model as pickle file
-        - Saves scaler for preprocessing new data
-        - Saves metrics as JSON for tracking
+        - Saves the model as an LZ4-compressed joblib file (load it with
+          joblib.load); no scaler is written, as the forest is trained on
+          raw features
+        - Also exports the model to ONNX when skl2onnx is installed, and
+          compiles it to a native predictor library (model.so) when treelite
+          and tl2cgen are installed
+        - Saves metrics as JSON for tracking, plus a single-row Parquet table
+          (when pyarrow is installed) so runs can be aggregated by column
+        - The independent files are written concurrently on a thread pool
+        - A scaler.pkl left by an older, scaler-trained model is removed
     """
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
 
-    # Save model
-    model_path = output_path / "model.pkl"
-    with open(model_path, "wb") as f:
-        pickle.dump(model, f)
-    logger.info(f"Model saved to {model_path}")
-
-    # Save scaler
-    scaler_path = output_path / "scaler.pkl"
-    with open(scaler_path, "wb") as f:
-        pickle.dump(scaler, f)
-    logger.info(f"Scaler saved to {scaler_path}")
-
-    # Save metrics
-    metrics_path = output_path / "metrics.json"
-    with open(metrics_path, "w") as f:
-        json.dump(metrics, f, indent=2)
-    logger.info(f"Metrics saved to {metrics_path}")
-
-    # Save model info
+    # The forest is trained on raw features; never leave a scaler from an
+    # older model next to it
+    stale_scaler = output_path / "scaler.pkl"
+    if stale_scaler.exists():
+        stale_scaler.unlink()
+        logger.warning(f"Removed stale {stale_scaler}")
+
     model_info = {
         "model_type": "RandomForestClassifier",
         "n_estimators": model.n_estimators,
         "n_features": model.n_features_in_,
-        "feature_names": model.feature_names_in_.tolist()
-        if hasattr(model, "feature_names_in_")
-        else None,
+        "feature_names": feature_names,
         "classes": model.classes_.tolist(),
+        "preprocessing": "none",
     }
-    info_path = output_path / "model_info.json"
-    with open(info_path, "w") as f:
-        json.dump(model_info, f, indent=2)
-    logger.info(f"Model info saved to {info_path}")
+
+    # The files are independent, so write them concurrently (compression,
+    # ONNX conversion and file I/O overlap instead of running back to back)
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        futures = [
+            executor.submit(_dump_joblib, model, output_path / "model.pkl", "Model"),
+            executor.submit(_export_onnx, model, output_path / "model.onnx"),
+            executor.submit(_export_treelite, model, output_path / "model.so"),
+            executor.submit(
+                _dump_json, metrics, output_path / "metrics.json", "Metrics"
+            ),
+            executor.submit(
+                _dump_json, model_info, output_path / "model_info.json", "Model info"
+            ),
+        ]
+        if pa is not None:
+            futures.append(
+                executor.submit(
+                    _dump_parquet, metrics, output_path / "metrics.parquet", "Metrics"
+                )
+            )
+        # Re-raise the first failure, if any
+        for future in futures:
+            future.result()
+
+
+def _dump_joblib(obj: object, path: Path, label: str) -> None:
+    """Save an object as an LZ4-compressed joblib file."""
+    # joblib already writes numpy arrays as raw buffers; the highest pickle
+    # protocol (5) also streams the remaining objects with its faster opcodes
+    joblib.dump(obj, path, compress=("lz4", 3), protocol=pickle.HIGHEST_PROTOCOL)
+    logger.info(f"{label} saved to {path}")
+
+
+def _dump_json(obj: dict, path: Path, label: str) -> None:
+    """Save a dictionary as indented JSON."""
+    if orjson is not None:
+        path.write_bytes(
+            orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+        )
+    else:
+        with open(path, "w") as f:
+            json.dump(obj, f, indent=2)
+    logger.info(f"{label} saved to {path}")
+
+
+def _dump_parquet(row: dict, path: Path, label: str) -> None:
+    """Save a dictionary of scalars as a single-row Parquet table."""
+    table = pa.table({key: [value] for key, value in row.items()})
+    pq.write_table(table, path, compression="zstd")
+    logger.info(f"{label} saved to {path}")
+
+
+def _export_onnx(model: RandomForestClassifier, path: Path) -> None:
+    """Export the model to ONNX for onnxruntime serving."""
+    if convert_sklearn is not None:
+        onnx_model = convert_sklearn(
+            model,
+            initial_types=[("input", FloatTensorType([None, model.n_features_in_]))],
+            options={id(model): {"zipmap": False}},
+        )
+        path.write_bytes(onnx_model.SerializeToString())
+        logger.info(f"ONNX model saved to {path}")
+    elif path.exists():
+        # Serving prefers model.onnx, so never leave one from an older model
+        path.unlink()
+        logger.warning(f"skl2onnx not installed, removed stale {path}")
+
+
+def _export_treelite(model: RandomForestClassifier, path: Path) -> None:
+    """Compile the model to a shared library for tl2cgen serving."""
+    if tl2cgen is not None:
+        try:
+            tl2cgen.export_lib(
+                treelite.sklearn.import_model(model),
+                toolchain="gcc",
+                libpath=str(path),
+                params={"parallel_comp": 4},
+                verbose=False,
+            )
+            logger.info(f"Compiled model saved to {path}")
+            return
+        except Exception as e:
+            # Compilation needs a C toolchain, which slim images may lack
+            logger.warning(f"Model compilation failed: {e}")
+    if path.exists():
+        # Serving prefers model.so, so never leave one from an older model
+        path.unlink()
+        logger.warning(f"Removed stale {path}")
 
 
 def main(
@@ -148,6 +325,9 @@ def main(
     n_estimators: int = 100,
     random_state: int = 42,
     output_dir: str = "models",
+    max_depth: int | None = 6,
+    max_features: str | int | float | None = None,
+    min_samples_leaf: int = 2,
 ) -> dict[str, float]:
     """
     Main training pipeline function.
@@ -157,6 +337,9 @@ def main(
         n_estimators: Number of trees in Random Forest
         random_state: Random seed for reproducibility
         output_dir: Directory to save model artifacts
+        max_depth: Maximum depth of each tree
+        max_features: Features considered per split (None = all)
+        min_samples_leaf: Minimum number of samples in a leaf
 
     Returns:
         Dict[str, float]: Training metrics
@@ -171,32 +354,40 @@ def main(
     X, y = load_and_prepare_data()
 
     # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=test_size, random_state=random_state, stratify=y
-    )
-    logger.info(f"Data split: {len(X_train)} train, {len(X_test)} test samples")
-
-    # Scale features
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
-
-    # Convert back to DataFrame to preserve feature names
-    X_train_scaled = pd.DataFrame(X_train_scaled, columns=X.columns)
-    X_test_scaled = pd.DataFrame(X_test_scaled, columns=X.columns)
-
-    # Train model
-    model = train_model(X_train_scaled, y_train, n_estimators, random_state)
-
-    # Evaluate model
-    train_score = model.score(X_train_scaled, y_train)
-    test_score = model.score(X_test_scaled, y_test)
+    train_idx, test_idx = stratified_split(y, test_size, random_state)
+    logger.info(f"Data split: {len(train_idx)} train, {len(test_idx)} test samples")
+
+    # Tree splits are invariant to monotonic feature transforms, so the
+    # forest is trained on raw features (no scaler). The splits are sliced
+    # out of plain arrays; the feature names are recorded in model_info.json
+    # instead of on the model
+    X_all = X.to_numpy()
+    y_true = y.to_numpy()
+
+    # The bundled dataset is finite, so skip sklearn's np.isfinite sweep
+    # over the features in fit and predict
+    with config_context(assume_finite=True):
+        # Train model
+        model = train_model(
+            X_all[train_idx],
+            y_true[train_idx],
+            n_estimators,
+            random_state,
+            max_depth=max_depth,
+            max_features=max_features,
+            min_samples_leaf=min_samples_leaf,
+        )
+
+        # Evaluate model (one forest pass over both splits)
+        y_pred = model.predict(X_all)
+    train_score = np.mean(y_pred[train_idx] == y_true[train_idx])
+    test_score = np.mean(y_pred[test_idx] == y_true[test_idx])
 
     metrics = {
         "train_accuracy": float(train_score),
         "test_accuracy": float(test_score),
-        "n_train_samples": len(X_train),
-        "n_test_samples": len(X_test),
+        "n_train_samples": len(train_idx),
+        "n_test_samples": len(test_idx),
         "n_features": X.shape[1],
         "n_classes": len(y.unique()),
     }
@@ -205,7 +396,7 @@ def main(
     logger.info(f"Test accuracy: {test_score:.4f}")
 
     # Save artifacts
-    save_artifacts(model, scaler, metrics, output_dir)
+    save_artifacts(model, metrics, output_dir, X.columns.tolist())
 
     logger.info("Training pipeline completed successfully")
     return metrics
@@ -4,15 +4,77 @@ Script to properly upload the iris pipeline to Kubeflow
 """
 
 import logging
+from pathlib import Path
+from typing import TYPE_CHECKING
 
-import kfp
+if TYPE_CHECKING:
+    import kfp
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def stream_upload_pipeline(
+    client: "kfp.Client", pipeline_file: str, pipeline_name: str, description: str
+) -> str:
+    """
+    Upload a pipeline package, streaming it from disk.
+
+    Args:
+        client: Connected KFP client (its host, credentials and cookies are
+            reused for the request)
+        pipeline_file: Path to the compiled pipeline YAML
+        pipeline_name: Display name of the pipeline
+        description: Pipeline description
+
+    Returns:
+        str: ID of the uploaded pipeline
+
+    Notes:
+        - client.upload_pipeline reads the whole package into memory before
+          sending it; MultipartEncoder sends it in small chunks instead
+        - Connection settings come from the client's generated API client,
+          which is not public kfp API: an AttributeError here means a kfp
+          release moved it, and callers should fall back to
+          client.upload_pipeline
+    """
+    # Imported here: only needed when a pipeline is actually uploaded
+    import requests
+    from requests_toolbelt import MultipartEncoder
+
+    api_client = client._upload_api.api_client
+    config = api_client.configuration
+
+    headers = dict(api_client.default_headers)
+    for auth in config.auth_settings().values():
+        if auth.get("value"):
+            headers[auth["key"]] = auth["value"]
+    if api_client.cookie:
+        headers["Cookie"] = api_client.cookie
+
+    with open(pipeline_file, "rb") as f:
+        encoder = MultipartEncoder(
+            fields={"uploadfile": (Path(pipeline_file).name, f, "application/x-yaml")}
+        )
+        headers["Content-Type"] = encoder.content_type
+        response = requests.post(
+            f"{config.host}/apis/v2beta1/pipelines/upload",
+            params={"name": pipeline_name, "description": description},
+            data=encoder,
+            headers=headers,
+            verify=config.ssl_ca_cert or config.verify_ssl,
+            timeout=300,
+        )
+    response.raise_for_status()
+    return response.json()["pipeline_id"]
+
+
 def upload_iris_pipeline():
     """Upload the iris pipeline to Kubeflow."""
+    # kfp pulls in gRPC, protobuf and the Kubernetes client, so it is only
+    # imported when the script actually runs
+    import kfp
+    import requests
 
     # Create client
     client = kfp.Client(host="http://localhost:8080")
@@ -20,32 +82,47 @@ def upload_iris_pipeline():
     pipeline_file = "iris_pipeline.yaml"
     pipeline_name = "iris-classification-pipeline"  # Use consistent naming
 
-    # First check if pipeline already exists
+    # First check if pipeline already exists (the server filters by name,
+    # so this is a single request however many pipelines are registered)
     try:
-        pipelines = client.list_pipelines()
-        for p in pipelines.pipelines:
-            if p.display_name == pipeline_name:
-                logger.info("✅ Pipeline already exists!")
-                logger.info(f"Pipeline ID: {p.pipeline_id}")
-                logger.info(
-                    f"View at: http://localhost:8080/#/pipelines/details/{p.pipeline_id}"
-                )
-                return
+        pipeline_id = client.get_pipeline_id(pipeline_name)
+        if pipeline_id is not None:
+            logger.info("✅ Pipeline already exists!")
+            logger.info(f"Pipeline ID: {pipeline_id}")
+            logger.info(
+                f"View at: http://localhost:8080/#/pipelines/details/{pipeline_id}"
+            )
+            return
     except Exception as e:
         logger.warning(f"Error checking existing pipelines: {e}")
 
+    description = (
+        "End-to-end ML pipeline with training, evaluation, serving, and monitoring"
+    )
+
     try:
         # Upload new pipeline
-        pipeline = client.upload_pipeline(
-            pipeline_package_path=pipeline_file,
-            pipeline_name=pipeline_name,
-            description="End-to-end ML pipeline with training, evaluation, serving, and monitoring",
-        )
+        try:
+            pipeline_id = stream_upload_pipeline(
+                client, pipeline_file, pipeline_name, description
+            )
+        except (AttributeError, ImportError, requests.ConnectionError) as e:
+            # Fall back only when the streaming path is unavailable (kfp
+            # internals moved, requests_toolbelt missing) or the connection
+            # failed. Timeouts, HTTP errors and bad responses propagate: the
+            # server may already have stored the package, and a second
+            # upload would fail on the duplicate name
+            logger.warning(f"Streaming upload failed ({e}), retrying with the SDK")
+            pipeline_id = client.get_pipeline_id(pipeline_name)
+            if pipeline_id is None:
+                pipeline_id = client.upload_pipeline(
+                    pipeline_package_path=pipeline_file,
+                    pipeline_name=pipeline_name,
+                    description=description,
+                ).pipeline_id
         logger.info("✅ Pipeline uploaded successfully!")
-        logger.info(f"Pipeline ID: {pipeline.pipeline_id}")
-        logger.info(
-            f"View at: http://localhost:8080/#/pipelines/details/{pipeline.pipeline_id}"
-        )
+        logger.info(f"Pipeline ID: {pipeline_id}")
+        logger.info(f"View at: http://localhost:8080/#/pipelines/details/{pipeline_id}")
 
     except Exception as e:
         logger.error(f"Failed to upload pipeline: {e}")
@@ -0,0 +1,50 @@
+"""Tests for the notebook converter's cell parser."""
+
+from notebooks.convert_to_notebook import create_notebook, parse_py_file
+
+
+def test_parse_splits_code_and_markdown_cells():
+    content = (
+        "import os\n"
+        "\n"
+        "# %% [markdown]\n"
+        "# # Title\n"
+        "# Some text\n"
+        "\n"
+        "  # %%\n"
+        'marker = "# %%"\n'
+        "# %%\n"
+        "y = 2"
+    )
+
+    assert parse_py_file(content) == [
+        {"cell_type": "code", "source": ["import os\n", "\n"]},
+        {"cell_type": "markdown", "source": ["# Title\n", "Some text\n", "\n"]},
+        {"cell_type": "code", "source": ['marker = "# %%"\n']},
+        {"cell_type": "code", "source": ["y = 2\n"]},
+    ]
+
+
+def test_parse_drops_blank_cells():
+    content = "# %%\n\n\n# %% [markdown]\n# \n\n# %%\nx = 1\n"
+
+    assert parse_py_file(content) == [{"cell_type": "code", "source": ["x = 1\n"]}]
+
+
+def test_parse_empty_content():
+    assert parse_py_file("") == []
+
+
+def test_create_notebook_trims_blank_lines_around_code():
+    cells = [
+        {"cell_type": "code", "source": ["\n", "x = 1\n", "\n", "y = 2\n", "\n"]},
+        {"cell_type": "markdown", "source": ["\n", "Text\n", "\n"]},
+    ]
+
+    notebook = create_notebook(cells)
+
+    assert [cell["source"] for cell in notebook["cells"]] == [
+        ["x = 1\n", "\n", "y = 2\n"],
+        ["\n", "Text\n", "\n"],
+    ]
+    assert notebook["nbformat"] == 4
@@ -0,0 +1,147 @@
+"""Tests for the evaluation helpers in evaluate_model."""
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.preprocessing import StandardScaler
+
+import train_model
+from evaluate_model import (
+    _confidence_stats_numba,
+    _confidence_stats_numpy,
+    classification_metrics_from_confusion_matrix,
+    evaluate_model_performance,
+    load_model_artifacts,
+)
+from evaluate_model import main as evaluate_main
+
+CLASS_NAMES = ["setosa", "versicolor", "virginica"]
+
+
+def _assert_report_matches(report: dict, expected: dict) -> None:
+    for key in [*CLASS_NAMES, "macro avg", "weighted avg"]:
+        for metric in ("precision", "recall", "f1-score", "support"):
+            assert report[key][metric] == pytest.approx(expected[key][metric])
+    assert report["accuracy"] == pytest.approx(expected["accuracy"])
+
+
+def test_matches_classification_report():
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 3, size=200)
+    y_pred = np.where(rng.random(200) < 0.8, y_true, rng.integers(0, 3, size=200))
+    labels = np.arange(3)
+
+    report = classification_metrics_from_confusion_matrix(
+        confusion_matrix(y_true, y_pred, labels=labels), CLASS_NAMES
+    )
+    expected = classification_report(
+        y_true, y_pred, labels=labels, target_names=CLASS_NAMES, output_dict=True
+    )
+
+    _assert_report_matches(report, expected)
+
+
+def test_class_absent_from_labels_and_predictions_keeps_its_row():
+    y_true = np.array([0, 0, 2, 2, 2, 0])
+    y_pred = np.array([0, 2, 2, 2, 0, 0])
+    labels = np.arange(3)
+
+    report = classification_metrics_from_confusion_matrix(
+        confusion_matrix(y_true, y_pred, labels=labels), CLASS_NAMES
+    )
+    expected = classification_report(
+        y_true,
+        y_pred,
+        labels=labels,
+        target_names=CLASS_NAMES,
+        output_dict=True,
+        zero_division=0,
+    )
+
+    _assert_report_matches(report, expected)
+    assert report["versicolor"]["support"] == 0
+
+
+def test_rejects_mismatched_target_names():
+    cm = np.eye(3, dtype=int)
+
+    with pytest.raises(ValueError, match="target_names"):
+        classification_metrics_from_confusion_matrix(cm, CLASS_NAMES[:2])
+
+
+@pytest.mark.parametrize("class_names", [CLASS_NAMES, None])
+def test_performance_uses_the_model_classes(class_names):
+    X, y = load_iris(return_X_y=True)
+    labels = np.array([10, 20, 30])
+    model = RandomForestClassifier(n_estimators=5, random_state=0)
+    model.fit(X, labels[y])
+    # Drop the virginica rows, so the last class has no support
+    X_test, y_test = X[y < 2], labels[y][y < 2]
+
+    results = evaluate_model_performance(model, X_test, y_test, class_names)
+
+    expected = confusion_matrix(y_test, model.predict(X_test), labels=labels)
+    assert results["confusion_matrix"] == expected.tolist()
+    last_class = (class_names or ["10", "20", "30"])[-1]
+    assert results["classification_report"][last_class]["support"] == 0
+
+
+@pytest.fixture(scope="module")
+def trained_model_dir(tmp_path_factory):
+    model_dir = tmp_path_factory.mktemp("models")
+    metrics = train_model.main(n_estimators=20, output_dir=str(model_dir))
+    return model_dir, metrics
+
+
+def _write_stale_scaler(model_dir) -> None:
+    X, _ = load_iris(return_X_y=True)
+    joblib.dump(StandardScaler().fit(X), model_dir / "scaler.pkl")
+
+
+def test_raw_feature_model_ignores_stale_scaler(trained_model_dir):
+    model_dir, train_metrics = trained_model_dir
+    _write_stale_scaler(model_dir)
+
+    _, scaler, _ = load_model_artifacts(str(model_dir))
+    results = evaluate_main(model_dir=str(model_dir), cv_folds=2)
+
+    assert scaler is None
+    assert results["evaluation_metrics"]["accuracy"] == pytest.approx(
+        train_metrics["test_accuracy"]
+    )
+
+
+def test_save_artifacts_removes_stale_scaler(trained_model_dir, tmp_path):
+    _write_stale_scaler(tmp_path)
+    model = joblib.load(trained_model_dir[0] / "model.pkl")
+
+    train_model.save_artifacts(model, {"test_accuracy": 1.0}, str(tmp_path))
+
+    assert not (tmp_path / "scaler.pkl").exists()
+
+
+def test_model_dir_without_preprocessing_entry_uses_its_scaler(tmp_path):
+    X, y = load_iris(return_X_y=True)
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=5, random_state=0)
+    joblib.dump(model.fit(scaler.transform(X), y), tmp_path / "model.pkl")
+    joblib.dump(scaler, tmp_path / "scaler.pkl")
+    (tmp_path / "metrics.json").write_text("{}")
+    (tmp_path / "model_info.json").write_text('{"classes": [0, 1, 2]}')
+
+    _, loaded_scaler, _ = load_model_artifacts(str(tmp_path))
+
+    assert loaded_scaler is not None
+
+
+@pytest.mark.skipif(_confidence_stats_numba is None, reason="numba not installed")
+@pytest.mark.parametrize("n", [1, 30, 1000])
+def test_confidence_kernel_matches_numpy(n):
+    proba = np.random.default_rng(n).dirichlet([1.0, 1.0, 1.0], size=n)
+
+    np.testing.assert_allclose(
+        _confidence_stats_numba(proba), _confidence_stats_numpy(proba), rtol=1e-12
+    )
@@ -0,0 +1,143 @@
+"""Tests for the drift statistics in monitor_drift."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import ks_2samp, wasserstein_distance
+
+from monitor_drift import (
+    KS_EXACT_MAX_N,
+    DriftMonitor,
+    _ks_2samp_presorted,
+    _ks_statistic,
+    simulate_drift_scenario,
+)
+
+
+@pytest.mark.parametrize(
+    ("n", "m"),
+    [(150, 30), (150, 150), (40, 7), (KS_EXACT_MAX_N + 1, 500)],
+)
+def test_ks_2samp_presorted_matches_scipy_auto(n, m):
+    rng = np.random.default_rng(n + m)
+    # Rounded values produce ties, as the Iris measurements do
+    reference = np.round(rng.normal(5.0, 1.0, size=n), 1)
+    current = np.round(rng.normal(5.3, 1.0, size=m), 1)
+
+    statistic, p_value = _ks_2samp_presorted(np.sort(reference), current)
+    expected = ks_2samp(reference, current, method="auto")
+
+    assert statistic == pytest.approx(expected.statistic, abs=1e-12)
+    assert p_value == pytest.approx(expected.pvalue, rel=1e-9, abs=1e-300)
+
+
+FEATURES = [
+    "sepal length (cm)",
+    "sepal width (cm)",
+    "petal length (cm)",
+    "petal width (cm)",
+]
+
+
+def _frame(rng: np.random.Generator, n: int, shift: float = 0.0) -> pd.DataFrame:
+    return pd.DataFrame(
+        rng.normal(shift, 1.0, size=(n, len(FEATURES))), columns=FEATURES
+    )
+
+
+@pytest.fixture
+def monitor(tmp_path):
+    return DriftMonitor(_frame(np.random.default_rng(0), 5000), model_path=tmp_path)
+
+
+def test_streaming_is_independent_of_chunking(monitor):
+    current = _frame(np.random.default_rng(1), 3000, shift=0.05)
+
+    whole = monitor.detect_data_drift_streaming(current, chunk_size=len(current))
+    chunked = monitor.detect_data_drift_streaming(current, chunk_size=7)
+
+    assert chunked["feature_drift"] == whole["feature_drift"]
+
+
+def test_streaming_p_values_are_conservative(monitor):
+    current = _frame(np.random.default_rng(2), 3000, shift=0.05)
+
+    results = monitor.detect_data_drift_streaming(current)
+
+    # The binned CDFs are compared at a subset of the points the exact test
+    # uses, so the statistic can only be smaller and the p-value larger
+    for column in FEATURES:
+        exact = ks_2samp(monitor._ref_sorted[column], current[column], method="asymp")
+        binned_p_value = results["feature_drift"][column]["drift_score"]
+        assert binned_p_value >= exact.pvalue * (1 - 1e-9)
+
+
+def test_streaming_flags_shifted_data(monitor):
+    rng = np.random.default_rng(3)
+
+    same = monitor.detect_data_drift_streaming(_frame(rng, 3000))
+    shifted = monitor.detect_data_drift_streaming(_frame(rng, 3000, shift=0.5))
+
+    assert same["n_features_drifted"] == 0
+    assert shifted["n_features_drifted"] == len(FEATURES)
+
+
+@pytest.mark.parametrize("current", [[], pd.DataFrame(columns=FEATURES)])
+def test_streaming_rejects_empty_data(monitor, current):
+    with pytest.raises(ValueError, match="No current data"):
+        monitor.detect_data_drift_streaming(current)
+
+
+def test_prediction_drift_wasserstein_with_missing_class(monitor):
+    reference = pd.DataFrame({"prediction": [0, 0, 1, 1, 2, 2]})
+    current = pd.DataFrame({"prediction": [0, 0, 0, 2]})
+
+    results = monitor.monitor_prediction_drift(current, reference)
+
+    expected = wasserstein_distance(
+        [0, 1, 2], [0, 1, 2], u_weights=[2, 2, 2], v_weights=[3, 0, 1]
+    )
+    assert results["wasserstein_distance"] == pytest.approx(expected, abs=1e-12)
+
+
+def test_prediction_drift_counts_any_labels(monitor):
+    reference = pd.DataFrame({"prediction": ["setosa", "virginica"] * 3})
+    current = pd.DataFrame({"prediction": ["setosa", "versicolor", "versicolor"]})
+
+    results = monitor.monitor_prediction_drift(current, reference)
+
+    assert results["current_distribution"] == pytest.approx(
+        {"setosa": 1 / 3, "versicolor": 2 / 3}
+    )
+    assert results["reference_distribution"] == {"setosa": 0.5, "virginica": 0.5}
+    expected = wasserstein_distance(
+        [0, 1, 2], [0, 1, 2], u_weights=[3, 0, 3], v_weights=[1, 2, 0]
+    )
+    assert results["wasserstein_distance"] == pytest.approx(expected, abs=1e-12)
+
+
+def test_simulate_drift_scenario_is_reproducible():
+    first = simulate_drift_scenario()
+    second = simulate_drift_scenario()
+
+    for a, b in zip(first, second):
+        pd.testing.assert_frame_equal(a, b)
+
+
+# The compiled kernel's py_func is the numba source run as plain Python; the
+# numpy fallback is the module kernel when numba is not installed
+KS_KERNELS = list(
+    dict.fromkeys([_ks_statistic, getattr(_ks_statistic, "py_func", _ks_statistic)])
+)
+
+
+@pytest.mark.parametrize("kernel", KS_KERNELS)
+@pytest.mark.parametrize(("n", "m"), [(150, 30), (7, 40), (1, 1), (2000, 999)])
+def test_ks_statistic_kernel_matches_scipy(kernel, n, m):
+    rng = np.random.default_rng(n * m)
+    reference = np.round(rng.normal(0.0, 1.0, size=n), 1)
+    current = np.round(rng.normal(0.2, 1.2, size=m), 1)
+
+    statistic = kernel(np.sort(reference), current)
+
+    assert statistic == pytest.approx(ks_2samp(reference, current).statistic)
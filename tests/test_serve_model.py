@@ -0,0 +1,189 @@
+"""Tests for the prediction paths and micro-batcher in serve_model."""
+
+import asyncio
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+import serve_model
+import train_model
+
+
+@pytest.fixture(scope="module")
+def forest() -> RandomForestClassifier:
+    X, y = load_iris(return_X_y=True)
+    return RandomForestClassifier(n_estimators=25, random_state=0).fit(X, y)
+
+
+@pytest.fixture
+def leaf_table_model(monkeypatch, forest):
+    """Install forest as the served model, without a scaler."""
+    trees = [estimator.tree_ for estimator in forest.estimators_]
+    forest.n_jobs = None
+    monkeypatch.setattr(serve_model, "MODEL", forest)
+    monkeypatch.setattr(serve_model, "TREES", trees)
+    monkeypatch.setattr(
+        serve_model, "LEAF_PROBS", serve_model._leaf_probability_table(trees)
+    )
+    monkeypatch.setattr(serve_model, "SCALER_MEAN", None)
+    monkeypatch.setattr(serve_model, "SCALER_SCALE", None)
+    return forest
+
+
+@pytest.fixture
+def served_model_globals(monkeypatch):
+    """Restore the globals load_model_artifacts sets after the test."""
+    for name in (
+        "MODEL",
+        "TREES",
+        "LEAF_PROBS",
+        "SCALER_MEAN",
+        "SCALER_SCALE",
+        "MODEL_INFO",
+        "MODEL_INFO_RESPONSE",
+    ):
+        monkeypatch.setattr(serve_model, name, getattr(serve_model, name))
+
+
+def _random_features(n: int) -> np.ndarray:
+    rng = np.random.default_rng(n)
+    return rng.uniform([4.0, 2.0, 1.0, 0.1], [8.0, 4.5, 7.0, 2.5], size=(n, 4))
+
+
+@pytest.mark.parametrize("n", [1, 17, serve_model.PARALLEL_PREDICT_MIN_ROWS - 1])
+def test_leaf_table_matches_predict_proba(leaf_table_model, n):
+    X = _random_features(n)
+
+    prediction_ids, probabilities = serve_model._predict(X)
+
+    np.testing.assert_array_equal(probabilities, leaf_table_model.predict_proba(X))
+    np.testing.assert_array_equal(prediction_ids, leaf_table_model.predict(X))
+
+
+def test_large_batches_leave_the_model_single_threaded(leaf_table_model):
+    X = _random_features(serve_model.PARALLEL_PREDICT_MIN_ROWS)
+
+    prediction_ids, probabilities = serve_model._predict(X)
+
+    np.testing.assert_array_equal(probabilities, leaf_table_model.predict_proba(X))
+    np.testing.assert_array_equal(prediction_ids, leaf_table_model.predict(X))
+    assert leaf_table_model.n_jobs is None
+
+
+def test_raw_feature_model_ignores_stale_scaler(served_model_globals, tmp_path):
+    train_model.main(n_estimators=10, output_dir=str(tmp_path))
+    X, _ = load_iris(return_X_y=True)
+    joblib.dump(StandardScaler().fit(X), tmp_path / "scaler.pkl")
+
+    serve_model.load_model_artifacts(str(tmp_path))
+    prediction_ids, _ = serve_model._predict(X)
+
+    assert serve_model.SCALER_MEAN is None
+    model = joblib.load(tmp_path / "model.pkl")
+    np.testing.assert_array_equal(prediction_ids, model.predict(X))
+
+
+def test_compiled_model_predicts_class_ids_with_named_classes(
+    served_model_globals, tmp_path
+):
+    pytest.importorskip("tl2cgen")
+    train_model.main(n_estimators=10, output_dir=str(tmp_path))
+    serve_model.load_model_artifacts(str(tmp_path))
+    if not isinstance(serve_model.MODEL, serve_model.tl2cgen.Predictor):
+        pytest.skip("compiled model.so was not exported")
+    # The training notebook records display names rather than class ids
+    serve_model.MODEL_INFO["classes"] = serve_model.CLASS_NAMES
+    X, _ = load_iris(return_X_y=True)
+
+    prediction_ids, _ = serve_model._predict(X)
+
+    model = joblib.load(tmp_path / "model.pkl")
+    np.testing.assert_array_equal(prediction_ids, model.predict(X))
+
+
+def _echo_predict(batches: list[int]):
+    """Fake _predict that returns each row's first feature as its class."""
+
+    def predict(X: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        batches.append(len(X))
+        return X[:, 0].astype(int), X[:, 1:]
+
+    return predict
+
+
+async def _submit(rows: list[tuple]) -> list[asyncio.Future]:
+    loop = asyncio.get_running_loop()
+    futures = [loop.create_future() for _ in rows]
+    for row, future in zip(rows, futures):
+        await serve_model.PREDICT_QUEUE.put((row, future))
+    return futures
+
+
+def _run_with_batcher(monkeypatch, predict, scenario):
+    """Run scenario() on a fresh event loop with the micro-batcher running."""
+
+    async def main():
+        monkeypatch.setattr(serve_model, "_predict", predict)
+        monkeypatch.setattr(serve_model, "PREDICT_QUEUE", asyncio.Queue())
+        worker = asyncio.create_task(serve_model._micro_batch_worker())
+        try:
+            return await asyncio.wait_for(scenario(), timeout=5)
+        finally:
+            worker.cancel()
+
+    return asyncio.run(main())
+
+
+def test_micro_batcher_resolves_each_future_with_its_row(monkeypatch):
+    batches = []
+    rows = [(float(i), i + 0.5, i + 0.25, 0.0) for i in range(150)]
+
+    async def scenario():
+        return await asyncio.gather(*await _submit(rows))
+
+    results = _run_with_batcher(monkeypatch, _echo_predict(batches), scenario)
+
+    assert results == [(int(row[0]), list(row[1:])) for row in rows]
+    assert sum(batches) == len(rows)
+    assert max(batches) <= serve_model.MICRO_BATCH_MAX_SIZE
+    assert len(batches) < len(rows)
+
+
+def test_micro_batcher_fans_errors_out_and_keeps_running(monkeypatch):
+    batches = []
+    echo = _echo_predict(batches)
+
+    def predict(X):
+        if not batches:
+            batches.append(len(X))
+            raise RuntimeError("model exploded")
+        return echo(X)
+
+    async def scenario():
+        failed = await _submit([(1.0, 0.0, 0.0, 0.0), (2.0, 0.0, 0.0, 0.0)])
+        errors = await asyncio.gather(*failed, return_exceptions=True)
+        (later,) = await _submit([(3.0, 0.5, 0.5, 0.0)])
+        return errors, await later
+
+    errors, later = _run_with_batcher(monkeypatch, predict, scenario)
+
+    assert [str(e) for e in errors] == ["model exploded", "model exploded"]
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert later == (3, [0.5, 0.5, 0.0])
+
+
+def test_micro_batcher_skips_cancelled_requests(monkeypatch):
+    batches = []
+
+    async def scenario():
+        first, second = await _submit([(1.0, 0.0, 0.0, 0.0), (2.0, 0.0, 0.0, 0.0)])
+        first.cancel()
+        return await second
+
+    result = _run_with_batcher(monkeypatch, _echo_predict(batches), scenario)
+
+    assert result == (2, [0.0, 0.0, 0.0])
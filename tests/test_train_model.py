@@ -0,0 +1,49 @@
+"""Tests for the training helpers in train_model."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from train_model import stratified_split
+
+
+@pytest.fixture
+def labels() -> np.ndarray:
+    # Unbalanced, shuffled classes
+    return np.random.default_rng(0).permutation(np.repeat([0, 1, 2], [50, 37, 13]))
+
+
+@pytest.mark.parametrize("test_size", [0.2, 0.25, 0.5])
+def test_per_class_test_counts(labels, test_size):
+    _, test_idx = stratified_split(labels, test_size=test_size)
+
+    for c in np.unique(labels):
+        n_c = np.sum(labels == c)
+        assert np.sum(labels[test_idx] == c) == round(test_size * n_c)
+
+
+def test_splits_are_disjoint_and_cover_all_rows(labels):
+    train_idx, test_idx = stratified_split(labels)
+
+    assert np.intersect1d(train_idx, test_idx).size == 0
+    np.testing.assert_array_equal(
+        np.sort(np.concatenate([train_idx, test_idx])), np.arange(len(labels))
+    )
+
+
+def test_deterministic_per_seed(labels):
+    first = stratified_split(labels, random_state=7)
+    second = stratified_split(labels, random_state=7)
+    other = stratified_split(labels, random_state=8)
+
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
+    assert not np.array_equal(first[1], other[1])
+
+
+def test_accepts_series(labels):
+    from_array = stratified_split(labels)
+    from_series = stratified_split(pd.Series(labels))
+
+    for a, b in zip(from_array, from_series):
+        np.testing.assert_array_equal(a, b)